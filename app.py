@@ -1,10 +1,15 @@
 import os
-import json
 import uuid
+import base64
+import hashlib
+import sqlite3
+from contextlib import closing
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from typing import Dict, List, Optional
 
-import pandas as pd
+import orjson
+import requests
 import streamlit as st
 
 # -------- Optional GitHub backend (recommended for persistence on Streamlit Cloud) --------
@@ -18,46 +23,238 @@ GITHUB_ENABLED = "github" in st.secrets
 
 if GITHUB_ENABLED:
     try:
-        from github import Github  # PyGithub
+        from github import Github, GithubException, InputGitTreeElement, UnknownObjectException  # PyGithub
     except Exception:
         GITHUB_ENABLED = False
 
+GITHUB_API = "https://api.github.com"
+
 # Paths in repo for data JSONs
 ITEMS_PATH = "data/items.json"
-THREADS_PATH = "data/threads.json"
+THREADS_DIR = "data/threads"                     # one file per thread: data/threads/<id>.json
+THREADS_INDEX_PATH = "data/threads_index.json"   # lightweight listing used by the forum tab
+LEGACY_THREADS_PATH = "data/threads.json"        # pre-sharding store, read-only fallback
 USERS_PATH = "data/users.json"
+DB_PATH = "data/forum.db"                        # local fallback store (SQLite)
+
+# Shared settings for every st.cache_data: no spinner flicker on reruns, and a TTL
+# so changes pushed by other sessions/processes show up without a write here.
+CACHE_KW = dict(show_spinner=False, ttl=60)
+
+PAGE_SIZE = 20  # rows per page in the directory and forum lists
 
 # ----------------------------- Utilities ---------------------------------
 
 def ts() -> str:
     return datetime.utcnow().isoformat() + "Z"
 
-@st.cache_data(show_spinner=False)
+@st.cache_data(**CACHE_KW)
 def _cache_bust() -> str:
     """Simple cache-buster value so we can force refresh when we write."""
     return str(uuid.uuid4())
 
+@st.cache_data(**CACHE_KW)
+def _items_search_index(key: str, _records: List[Dict]) -> Dict:
+    """Search structures for the directory, rebuilt only when `key` changes; `_records` is not hashed.
+
+    - "blob":    id -> lower-cased "title project_code work_type", for free-text substring search
+    - "by_code", "by_work_type", "by_tag": lower-cased value -> set of item ids
+    """
+    blob: Dict[str, str] = {}
+    by_code: Dict[str, set] = {}
+    by_work_type: Dict[str, set] = {}
+    by_tag: Dict[str, set] = {}
+    for r in _records:
+        item_id = r["id"]
+        code_l = str(r.get("project_code", "")).lower()
+        wtype_l = str(r.get("work_type", "")).lower()
+        blob[item_id] = f"{str(r.get('title', '')).lower()} {code_l} {wtype_l}"
+        by_code.setdefault(code_l, set()).add(item_id)
+        by_work_type.setdefault(wtype_l, set()).add(item_id)
+        for t in r.get("tags", []) or []:
+            by_tag.setdefault(str(t).lower(), set()).add(item_id)
+    return {"blob": blob, "by_code": by_code, "by_work_type": by_work_type, "by_tag": by_tag}
+
+
+def _index_hits(index: Dict[str, set], needle: str) -> set:
+    """Ids under every key containing `needle`; scans distinct values, not items."""
+    hits: set = set()
+    for value, ids in index.items():
+        if needle in value:
+            hits |= ids
+    return hits
+
+
+def _thread_haystack(entry: Dict) -> str:
+    """Lower-cased title, tags and opening message of a thread index entry, joined for substring search."""
+    parts = [str(entry.get("title", ""))]
+    parts += [str(t) for t in (entry.get("tags", []) or [])]
+    # entries written before `opening_text` existed only carry the truncated summary
+    parts.append(str(entry.get("opening_text", entry.get("summary", ""))))
+    return " ".join(parts).lower()
+
+
+@st.cache_data(**CACHE_KW)
+def _thread_haystacks(key: str, _records: List[Dict]) -> Dict[str, str]:
+    """Map thread id -> search haystack for the index entries, rebuilt only when `key` changes."""
+    return {t["id"]: _thread_haystack(t) for t in _records}
+
+
+def _store_key(path: str, sha: Optional[str]) -> str:
+    return f"{path}:{sha}:{_cache_bust()}"
+
 # ----------------------------- GitHub IO ---------------------------------
 
+@st.cache_resource(show_spinner=False)
 def _get_repo():
+    """Authenticated repository handle, shared across reruns and sessions."""
     gh = Github(st.secrets["github"]["token"])  # type: ignore[index]
     return gh.get_repo(st.secrets["github"]["repo"])  # type: ignore[index]
 
 
+@st.cache_resource(show_spinner=False)
+def _gh_session() -> requests.Session:
+    """HTTP session for raw REST reads, which (unlike PyGithub) can send If-None-Match."""
+    session = requests.Session()
+    session.headers.update({
+        "Authorization": f"Bearer {st.secrets['github']['token']}",  # type: ignore[index]
+        "Accept": "application/vnd.github+json",
+    })
+    return session
+
+
+@st.cache_resource(show_spinner=False)
+def _gh_blob_cache() -> Dict:
+    """Parsed JSON by blob sha. Blobs are immutable, so entries never go stale;
+    `_gh_load_all` prunes shas that are no longer in the branch tree."""
+    return {}
+
+
+@st.cache_resource(show_spinner=False)
+def _gh_etag_cache() -> Dict:
+    """url -> (ETag, parsed payload) of the last 200 response, shared by all sessions."""
+    return {}
+
+
+def _gh_repo_url(suffix: str) -> str:
+    return f"{GITHUB_API}/repos/{st.secrets['github']['repo']}/{suffix}"  # type: ignore[index]
+
+
+def _gh_conditional_get(url: str, parse):
+    """GET `url` with the ETag from the last response for that url.
+
+    A 304 reuses the stored payload (GitHub does not count it against the rate
+    limit); a 200 is parsed with `parse` and stored with its ETag. Callers are
+    cached functions that hand out copies, so stored payloads are never mutated.
+    """
+    etags = _gh_etag_cache()
+    cached = etags.get(url)
+    headers = {"If-None-Match": cached[0]} if cached else {}
+    resp = _gh_session().get(url, headers=headers, timeout=15)
+    if resp.status_code == 304 and cached:
+        return cached[1]
+    resp.raise_for_status()
+    payload = parse(resp.json())
+    etag = resp.headers.get("ETag")
+    if etag:
+        etags[url] = (etag, payload)
+    return payload
+
+
+@st.cache_data(**CACHE_KW)
+def _gh_read_json_cached(path: str, bust_token: str):
+    """Fetch (data, sha) for `path`; `bust_token` ties the entry to the last write.
+
+    Only a missing file resolves to (None, None); any other failure raises, so
+    st.cache_data does not keep it and the next rerun tries again.
+    """
+    branch = st.secrets["github"].get("branch", "main")  # type: ignore[index]
+    try:
+        return _gh_conditional_get(
+            _gh_repo_url(f"contents/{path}?ref={branch}"),
+            lambda body: (orjson.loads(base64.b64decode(body["content"])), body["sha"]),
+        )
+    except requests.HTTPError as e:
+        if e.response is not None and e.response.status_code == 404:
+            return None, None
+        raise
+
+
 def _gh_read_json(path: str, default):
     try:
-        repo = _get_repo()
-        file = repo.get_contents(path, ref=st.secrets["github"].get("branch", "main"))  # type: ignore[index]
-        content = file.decoded_content.decode("utf-8")
-        return json.loads(content), file.sha
+        data, sha = _gh_read_json_cached(path, _cache_bust())
     except Exception:
         return default, None
+    if data is None:
+        return default, None
+    return data, sha
+
+
+@st.cache_data(**CACHE_KW)
+def _gh_load_all(paths: tuple, bust_token: str) -> Dict:
+    """Load several JSON files with one tree request plus parallel blob fetches.
+
+    Returns {path: (data, sha)}; files missing from the tree map to (None, None).
+    A failed tree or blob request raises, so the failure is not cached; blobs that
+    did arrive stay in `_gh_blob_cache` and are not downloaded again on the retry.
+    """
+    out: Dict = {p: (None, None) for p in paths}
+    branch = st.secrets["github"].get("branch", "main")  # type: ignore[index]
+    shas = _gh_conditional_get(
+        _gh_repo_url(f"git/trees/{branch}?recursive=1"),
+        lambda body: {e["path"]: e["sha"] for e in body.get("tree", []) if e.get("type") == "blob"},
+    )
+    wanted = [p for p in paths if p in shas]
+    blobs = _gh_blob_cache()
+    live = {shas[p] for p in wanted}
+    for sha in list(blobs):
+        if sha not in live:
+            blobs.pop(sha, None)
+    session = _gh_session()
+    blobs_url = _gh_repo_url("git/blobs")
+
+    def _fetch(path: str):
+        sha = shas[path]
+        # .get, not `in` + [], so a concurrent prune by another session can't KeyError
+        data = blobs.get(sha)
+        if data is None:
+            resp = session.get(f"{blobs_url}/{sha}", timeout=15)
+            resp.raise_for_status()
+            data = orjson.loads(base64.b64decode(resp.json()["content"]))
+            blobs[sha] = data
+        return data, sha
+
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        for path, result in zip(wanted, pool.map(_fetch, wanted)):
+            out[path] = result
+    return out
+
+
+def _gh_read_stores(defaults: Dict) -> Dict:
+    """Read several files at once; `defaults` maps path -> default value."""
+    try:
+        loaded = _gh_load_all(tuple(defaults), _cache_bust())
+    except Exception:
+        # Batch read failed; fall back to one (uncached-on-error) read per file.
+        return {path: _gh_read_json(path, default) for path, default in defaults.items()}
+    return {
+        path: loaded[path] if loaded[path][0] is not None else (default, None)
+        for path, default in defaults.items()
+    }
+
+
+def _git_blob_sha(content: bytes) -> str:
+    """The sha git (and the GitHub API) assigns to a file with these exact bytes."""
+    return hashlib.sha1(b"blob %d\0" % len(content) + content).hexdigest()
 
 
 def _gh_write_json(path: str, data, sha: Optional[str], message: str = "update"):
+    content = orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+    if sha and _git_blob_sha(content) == sha:
+        # Identical to the file being replaced: skip the API call and the empty commit.
+        return True
     repo = _get_repo()
     branch = st.secrets["github"].get("branch", "main")  # type: ignore[index]
-    content = json.dumps(data, ensure_ascii=False, indent=2)
     try:
         if sha:
             repo.update_file(path, message, content, sha, branch=branch)
@@ -70,25 +267,231 @@ def _gh_write_json(path: str, data, sha: Optional[str], message: str = "update")
         st.error(f"Falha ao gravar no GitHub: {e}")
         return False
 
+
+def _gh_commit_files(build, message: str, attempts: int = 3) -> bool:
+    """Commit several JSON files as one git commit (Git Data API): all or nothing.
+
+    `build(read)` returns {path: data}; `read(path)` gives the JSON of `path` at the
+    commit being built upon (None if absent). If another write moved the branch in
+    the meantime the ref update is not a fast-forward, and `build` runs again on
+    the new head, up to `attempts` times.
+    """
+    repo = _get_repo()
+    branch = st.secrets["github"].get("branch", "main")  # type: ignore[index]
+    try:
+        for attempt in range(attempts):
+            ref = repo.get_git_ref(f"heads/{branch}")
+            base = repo.get_git_commit(ref.object.sha)
+
+            def _read(path: str):
+                try:
+                    return orjson.loads(repo.get_contents(path, ref=base.sha).decoded_content)
+                except UnknownObjectException:
+                    return None
+
+            elements = [
+                InputGitTreeElement(
+                    path, "100644", "blob",
+                    content=orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS).decode(),
+                )
+                for path, data in build(_read).items()
+            ]
+            tree = repo.create_git_tree(elements, base.tree)
+            commit = repo.create_git_commit(message, tree, [base])
+            try:
+                ref.edit(commit.sha)
+            except GithubException as e:
+                if e.status in (409, 422) and attempt + 1 < attempts:
+                    continue  # branch moved: rebuild on top of the new head
+                raise
+            _cache_bust.clear()
+            st.cache_data.clear()
+            return True
+    except Exception as e:
+        st.error(f"Falha ao gravar no GitHub: {e}")
+    return False
+
 # ----------------------------- Local IO (fallback) ------------------------
 
+@st.cache_data(**CACHE_KW)
+def _local_read_json_cached(path: str, bust_token: str):
+    # Like the GitHub reader: only a missing file is a cached None; other errors raise.
+    try:
+        with open(path, "rb") as f:
+            return orjson.loads(f.read())
+    except FileNotFoundError:
+        return None
+
+
 def _local_read_json(path: str, default):
-    if not os.path.exists(path):
+    if default is not None and not os.path.exists(path):
         os.makedirs(os.path.dirname(path), exist_ok=True)
-        with open(path, "w", encoding="utf-8") as f:
-            json.dump(default, f)
+        with open(path, "wb") as f:
+            f.write(orjson.dumps(default))
     try:
-        with open(path, "r", encoding="utf-8") as f:
-            return json.load(f), None
+        data = _local_read_json_cached(path, _cache_bust())
     except Exception:
         return default, None
+    if data is None:
+        return default, None
+    return data, None
+
+# ----------------------------- Local SQLite store (fallback) ---------------
+
+_DB_SCHEMA = """
+CREATE TABLE IF NOT EXISTS items (
+    id TEXT PRIMARY KEY,
+    title TEXT NOT NULL,
+    project_code TEXT,
+    work_type TEXT,
+    tags_json TEXT NOT NULL DEFAULT '[]',
+    created_by TEXT,
+    created_at TEXT,
+    updated_at TEXT,
+    upvotes INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS links (
+    item_id TEXT NOT NULL REFERENCES items(id),
+    url TEXT NOT NULL,
+    author TEXT,
+    at TEXT,
+    note TEXT
+);
+CREATE TABLE IF NOT EXISTS threads (
+    id TEXT PRIMARY KEY,
+    title TEXT NOT NULL,
+    created_by TEXT,
+    created_at TEXT,
+    tags_json TEXT NOT NULL DEFAULT '[]'
+);
+CREATE TABLE IF NOT EXISTS posts (
+    id TEXT PRIMARY KEY,
+    thread_id TEXT NOT NULL REFERENCES threads(id),
+    author TEXT,
+    at TEXT,
+    text TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_items_project_code ON items(project_code);
+CREATE INDEX IF NOT EXISTS idx_items_updated_at ON items(updated_at DESC);
+CREATE INDEX IF NOT EXISTS idx_links_item ON links(item_id);
+CREATE INDEX IF NOT EXISTS idx_posts_thread_at ON posts(thread_id, at);
+"""
+
+
+@st.cache_resource(show_spinner=False)
+def _db_init() -> str:
+    """Create the database and schema once per process; WAL mode is persisted in the file."""
+    os.makedirs(os.path.dirname(DB_PATH), exist_ok=True)
+    with closing(sqlite3.connect(DB_PATH, isolation_level=None)) as conn:
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(_DB_SCHEMA)
+    return DB_PATH
 
 
-def _local_write_json(path: str, data, message: str = "update"):
+def _db_connect() -> sqlite3.Connection:
+    # One autocommit connection per call: Streamlit sessions run on different threads.
+    conn = sqlite3.connect(_db_init(), isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    # Off by default in SQLite and scoped to the connection, so REFERENCES needs it on every open.
+    conn.execute("PRAGMA foreign_keys=ON")
+    return conn
+
+
+@st.cache_data(**CACHE_KW)
+def _db_read_items(bust_token: str) -> List[Dict]:
+    with closing(_db_connect()) as conn:
+        links: Dict[str, List[Dict]] = {}
+        for r in conn.execute("SELECT item_id, url, author, at, note FROM links ORDER BY rowid"):
+            links.setdefault(r["item_id"], []).append(
+                {"url": r["url"], "by": r["author"], "at": r["at"], "note": r["note"] or ""}
+            )
+        return [
+            {
+                "id": r["id"],
+                "title": r["title"],
+                "project_code": r["project_code"],
+                "work_type": r["work_type"],
+                "links": links.get(r["id"], []),
+                "tags": orjson.loads(r["tags_json"]),
+                "created_by": r["created_by"],
+                "created_at": r["created_at"],
+                "updated_at": r["updated_at"],
+                "upvotes": r["upvotes"],
+            }
+            for r in conn.execute("SELECT * FROM items")
+        ]
+
+
+@st.cache_data(**CACHE_KW)
+def _db_read_thread_index(bust_token: str) -> List[Dict]:
+    """Threads index (same shape as `thread_index_entry`) computed by the database."""
+    sql = """
+        SELECT t.id, t.title, t.created_by, t.created_at, t.tags_json,
+               COUNT(p.id) AS post_count,
+               COALESCE(MAX(p.at), t.created_at) AS last_at,
+               (SELECT f.text FROM posts f WHERE f.thread_id = t.id ORDER BY f.at, f.rowid LIMIT 1) AS summary
+        FROM threads t LEFT JOIN posts p ON p.thread_id = t.id
+        GROUP BY t.id
+    """
+    with closing(_db_connect()) as conn:
+        return [
+            {
+                "id": r["id"],
+                "title": r["title"],
+                "created_by": r["created_by"],
+                "created_at": r["created_at"],
+                "tags": orjson.loads(r["tags_json"]),
+                "post_count": r["post_count"],
+                "last_at": r["last_at"],
+                "summary": (r["summary"] or "")[:280],
+                "opening_text": r["summary"] or "",
+            }
+            for r in conn.execute(sql)
+        ]
+
+
+@st.cache_data(**CACHE_KW)
+def _db_read_thread(thread_id: str, bust_token: str) -> Optional[Dict]:
+    with closing(_db_connect()) as conn:
+        t = conn.execute("SELECT * FROM threads WHERE id = ?", (thread_id,)).fetchone()
+        if t is None:
+            return None
+        posts = conn.execute(
+            "SELECT id, author, at, text FROM posts WHERE thread_id = ? ORDER BY at, rowid", (thread_id,)
+        )
+        return {
+            "id": t["id"],
+            "title": t["title"],
+            "created_by": t["created_by"],
+            "created_at": t["created_at"],
+            "tags": orjson.loads(t["tags_json"]),
+            "posts": [{"id": p["id"], "by": p["author"], "at": p["at"], "text": p["text"]} for p in posts],
+        }
+
+
+def _db_write(statements: List[tuple]) -> bool:
+    """Run (sql, params) pairs in one transaction, then invalidate cached reads.
+
+    Every statement must touch a row: an UPDATE matching nothing or an insert
+    pointing at a missing parent rolls the whole batch back as "not found".
+    """
     try:
-        os.makedirs(os.path.dirname(path), exist_ok=True)
-        with open(path, "w", encoding="utf-8") as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+        with closing(_db_connect()) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                for sql, params in statements:
+                    try:
+                        cur = conn.execute(sql, params)
+                    except sqlite3.IntegrityError as e:
+                        if "FOREIGN KEY" not in str(e):
+                            raise
+                        raise LookupError("registro não encontrado") from e
+                    if cur.rowcount == 0:
+                        raise LookupError("registro não encontrado")
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
         _cache_bust.clear()
         st.cache_data.clear()
         return True
@@ -96,6 +499,20 @@ def _local_write_json(path: str, data, message: str = "update"):
         st.error(f"Falha ao gravar localmente: {e}")
         return False
 
+
+def _db_link_row(item_id: str, link: Dict) -> tuple:
+    return (
+        "INSERT INTO links (item_id, url, author, at, note) VALUES (?, ?, ?, ?, ?)",
+        (item_id, link["url"], link.get("by", ""), link.get("at", ""), link.get("note", "")),
+    )
+
+
+def _db_post_row(thread_id: str, post: Dict) -> tuple:
+    return (
+        "INSERT INTO posts (id, thread_id, author, at, text) VALUES (?, ?, ?, ?, ?)",
+        (post["id"], thread_id, post.get("by", ""), post.get("at", ""), post.get("text", "")),
+    )
+
 # ----------------------------- Data access layer --------------------------
 
 def read_store(path: str, default):
@@ -104,10 +521,176 @@ def read_store(path: str, default):
     return _local_read_json(path, default)
 
 
-def write_store(path: str, data, sha: Optional[str], message: str):
+def _get_users():
+    """User table, read on demand only (nothing on the main render path needs it)."""
+    users, users_sha = read_store(USERS_PATH, {})
+    if not isinstance(users, dict):
+        users = {}
+    return users, users_sha
+
+
+def thread_path(thread_id: str) -> str:
+    return f"{THREADS_DIR}/{thread_id}.json"
+
+
+def thread_index_entry(thread: Dict) -> Dict:
+    """Summary of a thread as stored in the threads index."""
+    posts = thread.get("posts", []) or []
+    return {
+        "id": thread["id"],
+        "title": thread.get("title", ""),
+        "created_by": thread.get("created_by", ""),
+        "created_at": thread.get("created_at", ""),
+        "tags": thread.get("tags", []) or [],
+        "post_count": len(posts),
+        "last_at": posts[-1].get("at", "") if posts else thread.get("created_at", ""),
+        "summary": (posts[0].get("text", "") if posts else "")[:280],
+        "opening_text": posts[0].get("text", "") if posts else "",
+    }
+
+
+def read_thread(thread_id: str):
+    """Load a single thread; on GitHub, threads not yet sharded are looked up in the legacy store."""
+    if not GITHUB_ENABLED:
+        return _db_read_thread(thread_id, _cache_bust()), None
+    data, sha = read_store(thread_path(thread_id), None)
+    if isinstance(data, dict):
+        return data, sha
+    legacy, _ = read_store(LEGACY_THREADS_PATH, [])
+    for th in legacy if isinstance(legacy, list) else []:
+        if th.get("id") == thread_id:
+            return th, None
+    return None, None
+
+
+def _gh_legacy_thread_index() -> List[Dict]:
+    """Threads index derived from the legacy single-file store, for trees without an index yet."""
+    legacy, _ = read_store(LEGACY_THREADS_PATH, [])
+    return [thread_index_entry(th) for th in legacy] if isinstance(legacy, list) else []
+
+
+def _gh_save_thread(thread_id: str, update, message: str) -> bool:
+    """Commit a thread file together with its threads-index entry.
+
+    `update(thread)` gets the thread as stored at the branch head (None if it does
+    not exist yet) and returns the thread to save. Both files land in one commit,
+    so a concurrent forum write can never leave the index out of sync.
+    """
+    def _build(read):
+        legacy = None
+        thread = read(thread_path(thread_id))
+        if not isinstance(thread, dict):
+            legacy = read(LEGACY_THREADS_PATH)
+            thread = next((th for th in legacy if th.get("id") == thread_id), None) if isinstance(legacy, list) else None
+        thread = update(thread)
+
+        index = read(THREADS_INDEX_PATH)
+        if not isinstance(index, list):
+            if legacy is None:
+                legacy = read(LEGACY_THREADS_PATH)
+            index = [thread_index_entry(th) for th in legacy] if isinstance(legacy, list) else []
+        entry = thread_index_entry(thread)
+        for i, existing in enumerate(index):
+            if existing.get("id") == thread_id:
+                index[i] = entry
+                break
+        else:
+            index.insert(0, entry)
+        return {thread_path(thread_id): thread, THREADS_INDEX_PATH: index}
+
+    return _gh_commit_files(_build, message)
+
+
+def _gh_update_item(item_id: str, mutate, message: str) -> bool:
+    """Apply `mutate` to one item of the cached items.json and write it back.
+
+    The read comes from `read_store`, so it may be up to a TTL old (writes bust
+    it); a stale sha makes `update_file` reject the write instead of clobbering.
+    """
+    items, sha = read_store(ITEMS_PATH, [])
+    it = next((it for it in items if it.get("id") == item_id), None) if isinstance(items, list) else None
+    if it is None:
+        st.error("Item não encontrado.")
+        return False
+    mutate(it)
+    return _gh_write_json(ITEMS_PATH, items, sha, message)
+
+
+def load_main_stores():
+    """Items and threads index for the page: (items, items_sha, thread_index, thread_index_sha)."""
+    if not GITHUB_ENABLED:
+        bust = _cache_bust()
+        return _db_read_items(bust), None, _db_read_thread_index(bust), None
+    stores = _gh_read_stores({ITEMS_PATH: [], THREADS_INDEX_PATH: None})
+    items, items_sha = stores[ITEMS_PATH]
+    thread_index, thread_index_sha = stores[THREADS_INDEX_PATH]
+    if thread_index is None:
+        # No index yet: it is written out by the next _gh_save_thread, after which
+        # the legacy file is only used by read_thread.
+        thread_index = _gh_legacy_thread_index()
+    return items, items_sha, thread_index, thread_index_sha
+
+
+def upvote_item(item_id: str, at: str) -> bool:
     if GITHUB_ENABLED:
-        return _gh_write_json(path, data, sha, message)
-    return _local_write_json(path, data, message)
+        def _mutate(it):
+            it["upvotes"] = int(it.get("upvotes", 0)) + 1
+            it["updated_at"] = at
+        return _gh_update_item(item_id, _mutate, f"upvote item {item_id}")
+    return _db_write([("UPDATE items SET upvotes = upvotes + 1, updated_at = ? WHERE id = ?", (at, item_id))])
+
+
+def add_item_link(item_id: str, link: Dict) -> bool:
+    if GITHUB_ENABLED:
+        def _mutate(it):
+            it.setdefault("links", []).append(link)
+            it["updated_at"] = link["at"]
+        return _gh_update_item(item_id, _mutate, f"add link to item {item_id}")
+    return _db_write([
+        _db_link_row(item_id, link),
+        ("UPDATE items SET updated_at = ? WHERE id = ?", (link["at"], item_id)),
+    ])
+
+
+def create_item(item: Dict) -> bool:
+    if GITHUB_ENABLED:
+        items, sha = read_store(ITEMS_PATH, [])
+        items = (items if isinstance(items, list) else []) + [item]
+        return _gh_write_json(ITEMS_PATH, items, sha, f"create item {item['id']}")
+    return _db_write([
+        (
+            "INSERT INTO items (id, title, project_code, work_type, tags_json, created_by, created_at, updated_at, upvotes)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (item["id"], item["title"], item["project_code"], item["work_type"],
+             orjson.dumps(item.get("tags", [])).decode(), item["created_by"],
+             item["created_at"], item["updated_at"], int(item.get("upvotes", 0))),
+        ),
+        *[_db_link_row(item["id"], lk) for lk in item.get("links", [])],
+    ])
+
+
+def create_thread(thread: Dict) -> bool:
+    if GITHUB_ENABLED:
+        return _gh_save_thread(thread["id"], lambda _: thread, f"create thread {thread['id']}")
+    return _db_write([
+        (
+            "INSERT INTO threads (id, title, created_by, created_at, tags_json) VALUES (?, ?, ?, ?, ?)",
+            (thread["id"], thread["title"], thread["created_by"], thread["created_at"],
+             orjson.dumps(thread.get("tags", [])).decode()),
+        ),
+        *[_db_post_row(thread["id"], p) for p in thread.get("posts", [])],
+    ])
+
+
+def add_post(thread_id: str, post: Dict) -> bool:
+    if GITHUB_ENABLED:
+        def _append(thread):
+            if thread is None:
+                raise LookupError("discussão não encontrada")
+            thread.setdefault("posts", []).append(post)
+            return thread
+        return _gh_save_thread(thread_id, _append, f"reply thread {thread_id}")
+    return _db_write([_db_post_row(thread_id, post)])
 
 # ----------------------------- Schemas ------------------------------------
 
@@ -125,7 +708,7 @@ def write_store(path: str, data, sha: Optional[str], message: str):
 #   "upvotes": int
 # }
 
-# threads: forum threads & posts
+# threads: forum threads & posts, one file per thread under THREADS_DIR
 # {
 #   "id": str,
 #   "title": str,
@@ -135,6 +718,12 @@ def write_store(path: str, data, sha: Optional[str], message: str):
 #   "tags": [str]
 # }
 
+# threads index: listing for the forum tab (see thread_index_entry)
+# [ {"id", "title", "created_by", "created_at", "tags", "post_count", "last_at",
+#    "summary",        # first 280 chars of the opening message
+#    "opening_text"}   # full opening message, searched by the forum filter
+# ]
+
 # ----------------------------- Auth (very light) --------------------------
 
 def get_current_user() -> str:
@@ -147,6 +736,20 @@ def get_current_user() -> str:
         st.session_state["_current_user"] = user.strip() or default_user
     return st.session_state["_current_user"]
 
+def _page_window(total: int, key: str) -> slice:
+    """Page selector (state kept in st.session_state[key]); returns the slice of rows to render."""
+    pages = max(1, -(-total // PAGE_SIZE))
+    if st.session_state.get(key, 1) > pages:
+        # filters shrank the result set below the remembered page
+        st.session_state[key] = pages
+    page = 1
+    if pages > 1:
+        page = int(st.number_input(f"Página (de {pages})", min_value=1, max_value=pages, step=1, key=key))
+    start = (page - 1) * PAGE_SIZE
+    if total:
+        st.caption(f"Mostrando {start + 1}–{min(start + PAGE_SIZE, total)} de {total}")
+    return slice(start, start + PAGE_SIZE)
+
 # ----------------------------- UI: Header ---------------------------------
 
 st.set_page_config(page_title="Exxata — Diretório & Fórum", page_icon="📁", layout="wide")
@@ -172,61 +775,156 @@ tab1, tab2, tab3 = st.tabs(["🔎 Diretório", "➕ Novo Item", "💬 Fórum"])
 
 # ----------------------------- Load stores --------------------------------
 
-items_default: List[Dict] = []
-threads_default: List[Dict] = []
-users_default: Dict = {}
-
-items, items_sha = read_store(ITEMS_PATH, items_default)
-threads, threads_sha = read_store(THREADS_PATH, threads_default)
-users, users_sha = read_store(USERS_PATH, users_default)
+items, items_sha, thread_index, thread_index_sha = load_main_stores()
 
 # Safety: ensure lists
 if not isinstance(items, list):
     items = []
-if not isinstance(threads, list):
-    threads = []
-if not isinstance(users, dict):
-    users = {}
+if not isinstance(thread_index, list):
+    thread_index = []
+
+# ----------------------------- Actions ------------------------------------
+# Widget callbacks. They run before the rerun that the click triggers anyway,
+# so the page renders fresh data without an extra st.rerun(), and they may
+# reset input widgets through st.session_state.
+
+def _upvote_item(item_id: str):
+    if upvote_item(item_id, ts()):
+        st.toast("Voto registrado.")
+
+
+def _add_item_link(item_id: str):
+    new_url = st.session_state.get(f"url_{item_id}", "")
+    note = st.session_state.get(f"note_{item_id}", "")
+    if not new_url:
+        st.toast("Informe a URL.", icon="⚠️")
+        return
+    link = {
+        "url": new_url.strip(),
+        "by": current_user,
+        "at": ts(),
+        "note": note.strip() if note else "",
+    }
+    if add_item_link(item_id, link):
+        st.session_state[f"url_{item_id}"] = ""
+        st.session_state[f"note_{item_id}"] = ""
+        st.toast("Link adicionado.")
+
+
+def _create_item():
+    title = st.session_state.get("new_item_title", "")
+    project_code = st.session_state.get("new_item_code", "")
+    work_type = st.session_state.get("new_item_work_type", "")
+    tags_raw = st.session_state.get("new_item_tags", "")
+    first_link = st.session_state.get("new_item_link", "")
+    note = st.session_state.get("new_item_note", "")
+    if not title or not project_code or not work_type:
+        st.toast("Preencha título, código do projeto e tipo de obra.", icon="⚠️")
+        return
+    now = ts()
+    new_item = {
+        "id": str(uuid.uuid4()),
+        "title": title.strip(),
+        "project_code": project_code.strip(),
+        "work_type": work_type.strip(),
+        "links": [],
+        "tags": [t.strip() for t in (tags_raw.split(",") if tags_raw else []) if t.strip()],
+        "created_by": current_user,
+        "created_at": now,
+        "updated_at": now,
+        "upvotes": 0,
+    }
+    if first_link:
+        new_item["links"].append({
+            "url": first_link.strip(),
+            "by": current_user,
+            "at": now,
+            "note": note.strip() if note else "",
+        })
+    if create_item(new_item):
+        st.toast("Item criado e publicado no diretório.")
+
+
+def _create_thread():
+    t_title = st.session_state.get("thread_title", "")
+    t_tags = st.session_state.get("thread_tags", "")
+    t_first = st.session_state.get("thread_first", "")
+    if not t_title or not t_first:
+        st.toast("Informe título e a primeira mensagem.", icon="⚠️")
+        return
+    now = ts()
+    thread = {
+        "id": str(uuid.uuid4()),
+        "title": t_title.strip(),
+        "created_by": current_user,
+        "created_at": now,
+        "tags": [t.strip() for t in (t_tags.split(",") if t_tags else []) if t.strip()],
+        "posts": [
+            {"id": str(uuid.uuid4()), "by": current_user, "at": now, "text": t_first.strip()}
+        ],
+    }
+    if create_thread(thread):
+        for key in ("thread_title", "thread_tags", "thread_first"):
+            st.session_state[key] = ""
+        st.toast("Discussão publicada.")
+
+
+def _reply_thread(entry: Dict):
+    reply = st.session_state.get(f"reply_{entry['id']}", "")
+    post = {
+        "id": str(uuid.uuid4()),
+        "by": current_user,
+        "at": ts(),
+        "text": reply.strip(),
+    }
+    if add_post(entry["id"], post):
+        # keep the header in sync for the fragment-only rerun
+        entry["post_count"] = int(entry.get("post_count", 0)) + 1
+        entry["last_at"] = post["at"]
+        st.session_state[f"reply_{entry['id']}"] = ""
+        st.toast("Resposta publicada.")
 
 # ----------------------------- Tab: Directory -----------------------------
 with tab1:
     st.subheader("🔎 Buscar documentos compartilhados")
-    qcol1, qcol2, qcol3, qcol4 = st.columns([2, 1.2, 1.2, 1])
-    with qcol1:
-        q = st.text_input("Texto livre (título, tags, código, etc.)", placeholder="ex.: carta status, FT02, drenagem")
-    with qcol2:
-        code = st.text_input("Código do Projeto", placeholder="ex.: FT02, 0738")
-    with qcol3:
-        work_type = st.text_input("Tipo de Obra", placeholder="ex.: subestação, via, drenagem")
-    with qcol4:
-        order = st.selectbox("Ordenar por", ["Mais recentes", "Mais votados", "Título (A→Z)"])
-
-    df = pd.DataFrame(items)
-    if not df.empty:
-        # lightweight filtering
-        mask = pd.Series([True] * len(df))
+    # Inside a form, typing does not rerun the app; filters apply on submit
+    with st.form("filter_form"):
+        qcol1, qcol2, qcol3, qcol4 = st.columns([2, 1.2, 1.2, 1])
+        with qcol1:
+            q = st.text_input("Texto livre (título, tags, código, etc.)", placeholder="ex.: carta status, FT02, drenagem")
+        with qcol2:
+            code = st.text_input("Código do Projeto", placeholder="ex.: FT02, 0738")
+        with qcol3:
+            work_type = st.text_input("Tipo de Obra", placeholder="ex.: subestação, via, drenagem")
+        with qcol4:
+            order = st.selectbox("Ordenar por", ["Mais recentes", "Mais votados", "Título (A→Z)"])
+        st.form_submit_button("Aplicar filtros")
+
+    if items:
+        # candidate ids from the search index; None means "no constraint yet"
+        ids = None
+        if q or code or work_type:
+            search = _items_search_index(_store_key(ITEMS_PATH, items_sha), items)
         if q:
             q_lower = q.lower()
-            mask &= (
-                df["title"].str.lower().str.contains(q_lower, na=False)
-                | df.get("project_code", pd.Series([""] * len(df))).astype(str).str.lower().str.contains(q_lower, na=False)
-                | df.get("work_type", pd.Series([""] * len(df))).astype(str).str.lower().str.contains(q_lower, na=False)
-                | df.get("tags", pd.Series([[]] * len(df))).apply(lambda x: any(q_lower in str(t).lower() for t in (x or [])))
-            )
+            ids = {item_id for item_id, blob in search["blob"].items() if q_lower in blob}
+            ids |= _index_hits(search["by_tag"], q_lower)
         if code:
-            mask &= df.get("project_code", pd.Series([""] * len(df))).astype(str).str.contains(code, case=False, na=False)
+            hits = _index_hits(search["by_code"], code.lower())
+            ids = hits if ids is None else ids & hits
         if work_type:
-            mask &= df.get("work_type", pd.Series([""] * len(df))).astype(str).str.contains(work_type, case=False, na=False)
-        df = df[mask]
+            hits = _index_hits(search["by_work_type"], work_type.lower())
+            ids = hits if ids is None else ids & hits
+        shown_items = items if ids is None else [it for it in items if it["id"] in ids]
 
         if order == "Mais votados":
-            df = df.sort_values("upvotes", ascending=False, na_position="last")
+            shown_items = sorted(shown_items, key=lambda it: int(it.get("upvotes", 0) or 0), reverse=True)
         elif order == "Título (A→Z)":
-            df = df.sort_values("title", ascending=True, na_position="last")
+            shown_items = sorted(shown_items, key=lambda it: it.get("title", ""))
         else:
-            df = df.sort_values("updated_at", ascending=False, na_position="last")
+            shown_items = sorted(shown_items, key=lambda it: it.get("updated_at", ""), reverse=True)
 
-        for _, row in df.iterrows():
+        for row in shown_items[_page_window(len(shown_items), "dir_page")]:
             with st.container(border=True):
                 left, right = st.columns([5, 1])
                 with left:
@@ -250,38 +948,11 @@ with tab1:
                     st.caption(f"Criado por {row.get('created_by','?')} em {row.get('created_at','?')}. Última atualização: {row.get('updated_at','?')}")
                 with right:
                     # Upvote & add link quick actions
-                    if st.button("👍 Votar", key=f"up_{row['id']}"):
-                        # update upvotes
-                        for it in items:
-                            if it["id"] == row["id"]:
-                                it["upvotes"] = int(it.get("upvotes", 0)) + 1
-                                it["updated_at"] = ts()
-                                break
-                        ok = write_store(ITEMS_PATH, items, items_sha, f"upvote item {row['id']}")
-                        if ok:
-                            st.success("Voto registrado.")
-                            st.experimental_rerun()
+                    st.button("👍 Votar", key=f"up_{row['id']}", on_click=_upvote_item, args=(row["id"],))
                     with st.popover("➕ Adicionar link"):
-                        new_url = st.text_input("URL do documento", key=f"url_{row['id']}")
-                        note = st.text_input("Observação (opcional)", key=f"note_{row['id']}")
-                        if st.button("Salvar link", key=f"save_link_{row['id']}"):
-                            if new_url:
-                                for it in items:
-                                    if it["id"] == row["id"]:
-                                        it.setdefault("links", []).append({
-                                            "url": new_url.strip(),
-                                            "by": current_user,
-                                            "at": ts(),
-                                            "note": note.strip() if note else "",
-                                        })
-                                        it["updated_at"] = ts()
-                                        break
-                                ok = write_store(ITEMS_PATH, items, items_sha, f"add link to item {row['id']}")
-                                if ok:
-                                    st.success("Link adicionado.")
-                                    st.experimental_rerun()
-                            else:
-                                st.warning("Informe a URL.")
+                        st.text_input("URL do documento", key=f"url_{row['id']}")
+                        st.text_input("Observação (opcional)", key=f"note_{row['id']}")
+                        st.button("Salvar link", key=f"save_link_{row['id']}", on_click=_add_item_link, args=(row["id"],))
     else:
         st.info("Nenhum item cadastrado ainda. Use a aba **➕ Novo Item** para criar o primeiro.")
 
@@ -289,131 +960,82 @@ with tab1:
 with tab2:
     st.subheader("➕ Criar novo item de diretório")
     with st.form("new_item_form", clear_on_submit=True):
-        title = st.text_input("Título do item", placeholder="ex.: Carta Status")
-        project_code = st.text_input("Código do projeto", placeholder="ex.: FT02, 0738, etc.")
-        work_type = st.text_input("Tipo de obra", placeholder="ex.: subestação, via, drenagem")
-        tags_raw = st.text_input("Tags (separadas por vírgula)", placeholder="ex.: carta, status, FT02")
-        first_link = st.text_input("Link inicial (Dropbox, Construmanager, etc.)", placeholder="https://...")
-        note = st.text_input("Observação do link (opcional)")
-        submitted = st.form_submit_button("Criar item")
-
-    if submitted:
-        if not title or not project_code or not work_type:
-            st.error("Preencha título, código do projeto e tipo de obra.")
-        else:
-            new_item = {
-                "id": str(uuid.uuid4()),
-                "title": title.strip(),
-                "project_code": project_code.strip(),
-                "work_type": work_type.strip(),
-                "links": [],
-                "tags": [t.strip() for t in (tags_raw.split(",") if tags_raw else []) if t.strip()],
-                "created_by": current_user,
-                "created_at": ts(),
-                "updated_at": ts(),
-                "upvotes": 0,
-            }
-            if first_link:
-                new_item["links"].append({
-                    "url": first_link.strip(),
-                    "by": current_user,
-                    "at": ts(),
-                    "note": note.strip() if note else "",
-                })
-            items.append(new_item)
-            ok = write_store(ITEMS_PATH, items, items_sha, f"create item {new_item['id']}")
-            if ok:
-                st.success("Item criado e publicado no diretório.")
-                st.experimental_rerun()
+        st.text_input("Título do item", key="new_item_title", placeholder="ex.: Carta Status")
+        st.text_input("Código do projeto", key="new_item_code", placeholder="ex.: FT02, 0738, etc.")
+        st.text_input("Tipo de obra", key="new_item_work_type", placeholder="ex.: subestação, via, drenagem")
+        st.text_input("Tags (separadas por vírgula)", key="new_item_tags", placeholder="ex.: carta, status, FT02")
+        st.text_input("Link inicial (Dropbox, Construmanager, etc.)", key="new_item_link", placeholder="https://...")
+        st.text_input("Observação do link (opcional)", key="new_item_note")
+        st.form_submit_button("Criar item", on_click=_create_item)
 
 # ----------------------------- Tab: Forum ---------------------------------
+
+@st.fragment
+def _render_thread(entry: Dict):
+    """One forum thread. As a fragment, its widgets rerun only this block, not the whole app."""
+    with st.container(border=True):
+        st.markdown(f"### {entry['title']}")
+        tags = entry.get("tags", []) or []
+        if tags:
+            st.write(" ".join([f"`{x}`" for x in tags]))
+        st.caption(f"Iniciado por {entry.get('created_by','?')} em {entry.get('created_at','?')} · {entry.get('post_count', 0)} mensagens")
+
+        # posts are only loaded for threads the user opens
+        if not st.toggle("Abrir conversa", key=f"open_{entry['id']}"):
+            return
+        thread, _ = read_thread(entry["id"])
+        if thread is None:
+            st.warning("Não foi possível carregar esta discussão.")
+            return
+
+        # list posts
+        for p in thread.get("posts", []) or []:
+            with st.chat_message(name=p.get("by","user")):
+                st.write(p.get("text",""))
+                st.caption(f"{p.get('by','?')} · {p.get('at','?')}")
+
+        # reply box, collapsed until the user wants to answer
+        with st.expander("Responder", expanded=False):
+            st.text_area("Responder", key=f"reply_{entry['id']}", placeholder="Escreva sua mensagem e envie.",
+                         label_visibility="collapsed")
+            st.button("Enviar resposta", key=f"send_{entry['id']}", on_click=_reply_thread, args=(entry,))
+
 with tab3:
     st.subheader("💬 Fórum de conversas")
 
     # Compose new thread
     with st.expander("➕ Nova discussão"):
-        t_title = st.text_input("Título da discussão", key="thread_title")
-        t_tags = st.text_input("Tags (vírgulas)", key="thread_tags", placeholder="ex.: FT02, drenagem, contrato")
-        t_first = st.text_area("Mensagem inicial", key="thread_first", placeholder="Escreva o contexto, links, dúvidas, etc.")
-        if st.button("Publicar discussão"):
-            if not t_title or not t_first:
-                st.warning("Informe título e a primeira mensagem.")
-            else:
-                thread = {
-                    "id": str(uuid.uuid4()),
-                    "title": t_title.strip(),
-                    "created_by": current_user,
-                    "created_at": ts(),
-                    "tags": [t.strip() for t in (t_tags.split(",") if t_tags else []) if t.strip()],
-                    "posts": [
-                        {"id": str(uuid.uuid4()), "by": current_user, "at": ts(), "text": t_first.strip()}
-                    ],
-                }
-                threads.insert(0, thread)
-                ok = write_store(THREADS_PATH, threads, threads_sha, f"create thread {thread['id']}")
-                if ok:
-                    st.success("Discussão publicada.")
-                    st.experimental_rerun()
+        st.text_input("Título da discussão", key="thread_title")
+        st.text_input("Tags (vírgulas)", key="thread_tags", placeholder="ex.: FT02, drenagem, contrato")
+        st.text_area("Mensagem inicial", key="thread_first", placeholder="Escreva o contexto, links, dúvidas, etc.")
+        st.button("Publicar discussão", on_click=_create_thread)
 
     # Filters
-    fcol1, fcol2 = st.columns([2, 1])
-    with fcol1:
-        tq = st.text_input("Buscar no fórum (título, texto, tags)", key="forum_q")
-    with fcol2:
-        sortf = st.selectbox("Ordenar por", ["Mais recentes", "Mais respondidas", "Título (A→Z)"])
-
-    if threads:
-        tdf = pd.DataFrame(threads)
-        # text search across title and posts
+    with st.form("forum_filter_form"):
+        fcol1, fcol2 = st.columns([2, 1])
+        with fcol1:
+            tq = st.text_input("Buscar no fórum (título, tags, mensagem inicial)", key="forum_q")
+        with fcol2:
+            sortf = st.selectbox("Ordenar por", ["Mais recentes", "Mais respondidas", "Título (A→Z)"])
+        st.form_submit_button("Aplicar filtros")
+
+    if thread_index:
+        # text search across title, tags and opening message
+        shown = thread_index
         if tq:
             tq_l = tq.lower()
-            def _match(row):
-                if tq_l in (row.get("title", "").lower()):
-                    return True
-                if any(tq_l in (p.get("text", "").lower()) for p in (row.get("posts", []) or [])):
-                    return True
-                if any(tq_l in str(t).lower() for t in (row.get("tags", []) or [])):
-                    return True
-                return False
-            tdf = tdf[tdf.apply(_match, axis=1)]
+            haystacks = _thread_haystacks(_store_key(THREADS_INDEX_PATH, thread_index_sha), thread_index)
+            shown = [t for t in thread_index if tq_l in haystacks.get(t["id"], "")]
 
         if sortf == "Mais respondidas":
-            tdf = tdf.sort_values(by=tdf["posts"].apply(lambda x: len(x or [])), ascending=False)
+            shown = sorted(shown, key=lambda t: int(t.get("post_count", 0)), reverse=True)
         elif sortf == "Título (A→Z)":
-            tdf = tdf.sort_values("title", ascending=True)
+            shown = sorted(shown, key=lambda t: t.get("title", ""))
         else:
-            tdf = tdf.sort_values("created_at", ascending=False)
+            shown = sorted(shown, key=lambda t: t.get("created_at", ""), reverse=True)
 
-        for _, t in tdf.iterrows():
-            with st.container(border=True):
-                st.markdown(f"### {t['title']}")
-                tags = t.get("tags", []) or []
-                if tags:
-                    st.write(" ".join([f"`{x}`" for x in tags]))
-                st.caption(f"Iniciado por {t.get('created_by','?')} em {t.get('created_at','?')} · {len(t.get('posts',[]) or [])} mensagens")
-
-                # list posts
-                for p in t.get("posts", []) or []:
-                    with st.chat_message(name=p.get("by","user")):
-                        st.write(p.get("text",""))
-                        st.caption(f"{p.get('by','?')} · {p.get('at','?')}")
-
-                # reply box
-                reply = st.text_area("Responder", key=f"reply_{t['id']}", placeholder="Escreva sua mensagem e envie.")
-                if st.button("Enviar resposta", key=f"send_{t['id']}"):
-                    for th in threads:
-                        if th["id"] == t["id"]:
-                            th.setdefault("posts", []).append({
-                                "id": str(uuid.uuid4()),
-                                "by": current_user,
-                                "at": ts(),
-                                "text": reply.strip(),
-                            })
-                            break
-                    ok = write_store(THREADS_PATH, threads, threads_sha, f"reply thread {t['id']}")
-                    if ok:
-                        st.success("Resposta publicada.")
-                        st.experimental_rerun()
+        for t in shown[_page_window(len(shown), "forum_page")]:
+            _render_thread(t)
     else:
         st.info("Nenhuma discussão aberta ainda. Crie a primeira acima.")
 